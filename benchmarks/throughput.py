@@ -0,0 +1,361 @@
+""" Throughput benchmarks for rlext environments, Record, and VideoWriter.
+
+Usage:
+    python benchmarks/throughput.py -o result.json
+    python benchmarks/throughput.py -o new.json --baseline result.json --threshold 0.2
+"""
+import json
+import platform
+import resource
+import statistics
+import tempfile
+import time
+import tracemalloc
+import typing as t
+from pathlib import Path
+
+import click
+import gym
+import numpy as np
+
+import rlext
+import rlext.environments  # noqa: F401 (register environments)
+
+from rlext.record import Record
+
+# Stock gym environment used as a reference point
+_REFERENCE_IDS = ["CartPole-v1"]
+
+
+def _registered_ids() -> t.List[str]:
+    registry = gym.envs.registry
+    specs = registry.values() if isinstance(registry, dict) else registry.all()
+    ids = []
+    for spec in specs:
+        entry_point = spec.entry_point
+        if isinstance(entry_point, str) and entry_point.startswith("rlext."):
+            ids.append(spec.id)
+    return sorted(ids)
+
+
+def _done(step_result: tuple) -> bool:
+    # (obs, reward, done, info) or (obs, reward, terminated, truncated, info)
+    if len(step_result) == 5:
+        return step_result[2] or step_result[3]
+    return step_result[2]
+
+
+def _seed(env: t.Any, seed: t.Union[int, t.List[int]]) -> None:
+    # gym >= 0.26 removed Env.seed in favor of reset(seed=...)
+    if hasattr(env, "seed"):
+        env.seed(seed)
+    else:
+        env.reset(seed=seed)
+
+
+def _maxrss_mb() -> float:
+    # KiB on Linux, bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / (1024.0 ** 2 if platform.system() == "Darwin" else 1024.0)
+
+
+def _measure(
+    make_fn: t.Callable[[], t.Callable[[], int]],
+    repeats: int,
+) -> t.Dict[str, float]:
+    """`make_fn` prepares a fresh state and returns a function that returns the
+    number of processed items. After a warm-up run, `repeats` runs are timed and
+    the median is reported. One more run is traced by tracemalloc separately, so
+    that tracing doesn't slow down timing.
+    """
+    make_fn()()
+    times = []
+    for _ in range(repeats):
+        fn = make_fn()
+        start = time.perf_counter()
+        n_items = fn()
+        times.append(time.perf_counter() - start)
+    elapsed = statistics.median(times)
+
+    fn = make_fn()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    n_blocks = sum(stat.count for stat in snapshot.statistics("filename"))
+    return {
+        "items": n_items,
+        "seconds": elapsed,
+        "repeats": repeats,
+        "throughput": n_items / max(elapsed, 1e-9),
+        "traced_peak_kb": peak / 1024.0,
+        "live_blocks": n_blocks,
+    }
+
+
+def _bench_env(env_id: str, n_steps: int, repeats: int) -> t.Dict[str, t.Any]:
+    env = gym.make(env_id)
+    _seed(env, 0)
+    env.action_space.seed(0)
+    # Pre-sample actions so that we don't measure the action space
+    actions = [env.action_space.sample() for _ in range(n_steps)]
+    n_resets = max(n_steps // 10, 1)
+
+    def make_reset() -> t.Callable[[], int]:
+        def reset() -> int:
+            for _ in range(n_resets):
+                env.reset()
+            return n_resets
+
+        return reset
+
+    def make_step() -> t.Callable[[], int]:
+        env.reset()
+
+        def step() -> int:
+            for action in actions:
+                if _done(env.step(action)):
+                    env.reset()
+            return n_steps
+
+        return step
+
+    result = {
+        "reset": _measure(make_reset, repeats),
+        "step": _measure(make_step, repeats),
+    }
+    env.close()
+    return result
+
+
+def _bench_vector_env(
+    env_id: str,
+    n_steps: int,
+    n_envs: int,
+    repeats: int,
+) -> t.Dict[str, t.Any]:
+    envs = gym.vector.SyncVectorEnv([lambda: gym.make(env_id)] * n_envs)
+    _seed(envs, list(range(n_envs)))
+    envs.action_space.seed(0)
+    # SyncVectorEnv resets finished environments automatically
+    actions = [envs.action_space.sample() for _ in range(n_steps)]
+    n_resets = max(n_steps // 10, 1)
+
+    def make_reset() -> t.Callable[[], int]:
+        def reset() -> int:
+            for _ in range(n_resets):
+                envs.reset()
+            return n_resets * n_envs
+
+        return reset
+
+    def make_step() -> t.Callable[[], int]:
+        envs.reset()
+
+        def step() -> int:
+            for action in actions:
+                envs.step(action)
+            return n_steps * n_envs
+
+        return step
+
+    result = {
+        "reset": _measure(make_reset, repeats),
+        "step": _measure(make_step, repeats),
+    }
+    envs.close()
+    return result
+
+
+def _bench_record(n_rows: int, save_fn: str, repeats: int) -> t.Dict[str, t.Any]:
+    rows = [{"step": i, "reward": float(i) * 0.5, "loss": 1.0} for i in range(n_rows)]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        records = []
+
+        def make_record() -> Record:
+            path = Path(tmpdir) / f"log{len(records)}.{save_fn}"
+            record = Record(save_path=path, save_fn=save_fn)
+            records.append(record)
+            return record
+
+        def make_submit() -> t.Callable[[], int]:
+            record = make_record()
+
+            def submit() -> int:
+                for row in rows:
+                    record.submit(row)
+                return n_rows
+
+            return submit
+
+        def make_dump() -> t.Callable[[], int]:
+            record = make_record()
+            for row in rows:
+                record.submit(row)
+
+            def dump() -> int:
+                record._dump()
+                return n_rows
+
+            return dump
+
+        result = {
+            "submit": _measure(make_submit, repeats),
+            "dump": _measure(make_dump, repeats),
+        }
+        # Prevent atexit from writing into the removed directory
+        for record in records:
+            record._save_path = None
+    return result
+
+
+def _bench_video(
+    n_frames: int,
+    size: int,
+    repeats: int,
+) -> t.Optional[t.Dict[str, t.Any]]:
+    try:
+        from rlext.video import VideoWriter
+    except ImportError:
+        return None
+
+    frames = np.random.randint(0, 256, size=(8, size, size, 3), dtype=np.uint8)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        writers = []
+
+        def make_append() -> t.Callable[[], int]:
+            writer = VideoWriter(Path(tmpdir) / f"video{len(writers)}.avi")
+            writers.append(writer)
+
+            def append() -> int:
+                for i in range(n_frames):
+                    writer.append(frames[i % len(frames)])
+                return n_frames
+
+            return append
+
+        result = {"append": _measure(make_append, repeats)}
+        for writer in writers:
+            writer.close()
+    return result
+
+
+def _flatten(
+    result: t.Dict[str, t.Any],
+    prefix: str = "",
+) -> t.Iterable[t.Tuple[str, float]]:
+    for key, value in result.items():
+        name = f"{prefix}/{key}" if prefix else key
+        if isinstance(value, dict):
+            if "throughput" in value:
+                yield name, value["throughput"]
+            else:
+                yield from _flatten(value, name)
+
+
+def _check_regression(
+    result: t.Dict[str, t.Any],
+    baseline: t.Dict[str, t.Any],
+    threshold: float,
+) -> t.List[str]:
+    current = dict(_flatten(result["benchmarks"]))
+    regressions = []
+    for name, base in _flatten(baseline["benchmarks"]):
+        if name not in current:
+            regressions.append(f"{name}: missing in the current result")
+            continue
+        if base <= 0.0:
+            # Nothing to compare with
+            continue
+        ratio = current[name] / base
+        if ratio < 1.0 - threshold:
+            regressions.append(f"{name}: {base:.1f} -> {current[name]:.1f}/s")
+    return regressions
+
+
+@click.command()
+@click.option("--output", "-o", type=click.Path(), default="bench_output.json")
+@click.option("--env-id", "env_ids", multiple=True, help="Default: all rlext ids")
+@click.option("--n-steps", type=int, default=10000)
+@click.option("--n-envs", type=int, default=16, help="Number of envs in SyncVectorEnv")
+@click.option("--n-rows", type=int, default=100000)
+@click.option("--n-frames", type=int, default=200)
+@click.option("--frame-size", type=int, default=400)
+@click.option("--repeats", type=int, default=5, help="Median of them is reported")
+@click.option("--baseline", type=click.Path(exists=True), default=None)
+@click.option("--threshold", type=float, default=0.2)
+def main(
+    output: str,
+    env_ids: t.Tuple[str, ...],
+    n_steps: int,
+    n_envs: int,
+    n_rows: int,
+    n_frames: int,
+    frame_size: int,
+    repeats: int,
+    baseline: t.Optional[str],
+    threshold: float,
+) -> None:
+    if len(env_ids) == 0:
+        env_ids = _registered_ids() + _REFERENCE_IDS
+
+    if repeats < 1:
+        raise click.BadParameter("should be positive", param_hint="--repeats")
+
+    benchmarks = {"env": {}, "record": {}}
+    errors = []
+    for env_id in env_ids:
+        click.echo(f"Environment: {env_id}")
+        try:
+            n_vector_steps = max(n_steps // n_envs, 1)
+            benchmarks["env"][env_id] = {
+                "scalar": _bench_env(env_id, n_steps, repeats),
+                "vector": _bench_vector_env(env_id, n_vector_steps, n_envs, repeats),
+            }
+        except Exception as e:
+            click.secho(f"Failed: {e!r}", fg="red")
+            benchmarks["env"][env_id] = {"error": repr(e)}
+            errors.append(f"{env_id}: {e!r}")
+    for save_fn in Record._SAVE_FUNCTIONS.keys():
+        click.echo(f"Record: {save_fn}")
+        try:
+            benchmarks["record"][save_fn] = _bench_record(n_rows, save_fn, repeats)
+        except ImportError as e:
+            click.echo(f"Skipped: {e}")
+    click.echo("VideoWriter")
+    video = _bench_video(n_frames, frame_size, repeats)
+    if video is not None:
+        benchmarks["video"] = video
+
+    result = {
+        "rlext": rlext.__version__,
+        "gym": gym.__version__,
+        "numpy": np.__version__,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        # Peak RSS of the whole run
+        "maxrss_mb": _maxrss_mb(),
+        "benchmarks": benchmarks,
+    }
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+    for name, throughput in _flatten(benchmarks):
+        click.echo(f"{name}: {throughput:.1f}/s")
+
+    failed = False
+    if len(errors) > 0:
+        click.secho("Errors:\n" + "\n".join(errors), fg="red")
+        failed = True
+    if baseline is not None:
+        with open(baseline) as f:
+            regressions = _check_regression(result, json.load(f), threshold)
+        if len(regressions) > 0:
+            click.secho("Regressions:\n" + "\n".join(regressions), fg="red")
+            failed = True
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
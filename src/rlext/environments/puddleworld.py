@@ -129,9 +129,9 @@ class ContinuousPuddleWorld(gym.Env):
 
 
 class PuddleWorld(ContinuousPuddleWorld):
-    ACTIONS = 0.05 * np.array([[1, 0], [0, 1], [-1, 0], [0, -1]], dtype=np.float)
+    ACTIONS = 0.05 * np.array([[1, 0], [0, 1], [-1, 0], [0, -1]], dtype=np.float64)
 
-    def __init__(self, noise: float) -> None:
+    def __init__(self, noise: float = 0.01) -> None:
         super().__init__(noise)
 
         self.action_space = gym.spaces.Discrete(4)
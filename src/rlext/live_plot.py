@@ -0,0 +1,231 @@
+""" LivePlot class that draws Record metrics in a separate process
+"""
+import atexit
+import multiprocessing as mp
+import queue
+import sys
+import time
+import typing as t
+from pathlib import Path
+
+
+def _to_float(value: t.Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def _is_headless() -> bool:
+    import matplotlib as mpl
+
+    mpl_ion = sys.modules.get("rlext.mpl_ion")
+    if mpl_ion is not None and mpl_ion.JUPYTER_MODE:
+        return True
+    backend = mpl.get_backend().lower()
+    return backend == "agg" or "inline" in backend
+
+
+def _plot_loop(
+    batch_queue: mp.Queue,
+    keys: t.List[str],
+    x_key: str,
+    backend: str,
+    png_path: t.Optional[Path],
+    max_fps: float,
+) -> None:
+    import matplotlib as mpl
+
+    mpl.use(backend)
+    from matplotlib import pyplot as plt
+
+    headless = png_path is not None
+    if not headless:
+        plt.ion()
+    fig, axes = plt.subplots(len(keys), 1, sharex=True, squeeze=False)
+    axes = axes[:, 0]
+    data = {key: [] for key in [x_key] + keys}
+    lines = {}
+    for ax, key in zip(axes, keys):
+        ax.set_ylabel(key)
+        (lines[key],) = ax.plot([], [], animated=not headless)
+    axes[-1].set_xlabel(x_key)
+
+    def full_draw() -> t.Any:
+        for ax in axes:
+            ax.relim()
+            ax.autoscale_view()
+        fig.canvas.draw()
+        if headless:
+            fig.savefig(png_path)
+            return None
+        background = fig.canvas.copy_from_bbox(fig.bbox)
+        for ax, key in zip(axes, keys):
+            ax.draw_artist(lines[key])
+        fig.canvas.blit(fig.bbox)
+        return background
+
+    def in_view(start: int) -> bool:
+        """Check if all points received after `start` are within the axes"""
+        xs = [x for x in data[x_key][start:] if x == x]  # x == x is False for NaN
+        if len(xs) == 0:
+            return True
+        x_min, x_max = min(xs), max(xs)
+        for ax, key in zip(axes, keys):
+            (x0, x1), (y0, y1) = ax.get_xlim(), ax.get_ylim()
+            if not (x0 <= x_min and x_max <= x1):
+                return False
+            ys = [y for y in data[key][start:] if y == y]
+            if len(ys) > 0 and not (y0 <= min(ys) and max(ys) <= y1):
+                return False
+        return True
+
+    background = full_draw()
+    n_drawn = 0
+    min_interval = 1.0 / max_fps
+    last_draw = time.perf_counter()
+    updated = False
+    running = True
+    while running:
+        if updated:
+            # Wait only until the frame cap allows to draw the pending update
+            timeout = max(min_interval - (time.perf_counter() - last_draw), 0.0)
+        elif headless:
+            timeout = None
+        else:
+            # Keep the window responsive
+            timeout = min_interval
+        try:
+            batch = batch_queue.get(timeout=timeout)
+            if batch is None:
+                running = False
+            else:
+                for key, values in batch.items():
+                    data[key].extend(values)
+                updated = True
+        except queue.Empty:
+            pass
+        if not updated:
+            if not headless:
+                fig.canvas.flush_events()
+            continue
+        if running and time.perf_counter() - last_draw < min_interval:
+            continue
+
+        for key in keys:
+            lines[key].set_data(data[x_key], data[key])
+        if headless or background is None or not in_view(n_drawn):
+            background = full_draw()
+        else:
+            fig.canvas.restore_region(background)
+            for ax, key in zip(axes, keys):
+                ax.draw_artist(lines[key])
+            fig.canvas.blit(fig.bbox)
+        if not headless:
+            fig.canvas.flush_events()
+        n_drawn = len(data[x_key])
+        last_draw = time.perf_counter()
+        updated = False
+    plt.close(fig)
+
+
+class LivePlot:
+    """Plot metrics submitted to `Record` in a separate process.
+    Every `decimation`-th row is kept and sent to the plotting process per
+    `batch_size` rows, without waiting for it. The figure is redrawn at most
+    `max_fps` times per second using blitting.
+    When matplotlib is headless (`nogui_mode`) or `JUPYTER_MODE` is on, the figure
+    is saved to `png_path` instead.
+    Since the plotting process is spawned, the main script should be guarded by
+    `if __name__ == "__main__"`.
+    """
+
+    def __init__(
+        self,
+        keys: t.List[str],
+        *,
+        x_key: t.Optional[str] = None,
+        decimation: int = 1,
+        batch_size: int = 10,
+        max_fps: float = 10.0,
+        png_path: Path = Path("live_plot.png"),
+        headless: t.Optional[bool] = None,
+        max_queue_size: int = 64,
+    ) -> None:
+        import matplotlib as mpl
+
+        if decimation < 1 or batch_size < 1:
+            raise ValueError("decimation and batch_size should be positive")
+        self._keys = keys
+        self._x_key = "index" if x_key is None else x_key
+        self._use_index = x_key is None
+        self._decimation = decimation
+        self._batch_size = batch_size
+        self._n_submitted = 0
+        self._pending = {key: [] for key in [self._x_key] + keys}
+        self._n_pending = 0
+        if headless is None:
+            headless = _is_headless()
+        ctx = mp.get_context("spawn")
+        self._queue = ctx.Queue(maxsize=max_queue_size)
+        self._process = ctx.Process(
+            target=_plot_loop,
+            args=(
+                self._queue,
+                keys,
+                self._x_key,
+                "agg" if headless else mpl.get_backend(),
+                png_path if headless else None,
+                max_fps,
+            ),
+            daemon=True,
+        )
+        self._process.start()
+        atexit.register(self.close)
+
+    def push(self, d: t.Dict[str, t.Any]) -> None:
+        if self._process is None:
+            return
+        self._n_submitted += 1
+        if (self._n_submitted - 1) % self._decimation != 0:
+            return
+        if self._use_index:
+            x = self._n_submitted - 1
+        else:
+            x = _to_float(d.get(self._x_key))
+            if x != x:  # Missing or not a number
+                return
+        self._pending[self._x_key].append(x)
+        for key in self._keys:
+            self._pending[key].append(_to_float(d.get(key)))
+        self._n_pending += 1
+        if self._n_pending >= self._batch_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._process is None:
+            return
+        if not self._process.is_alive():
+            # The plotting process died, so stop collecting rows
+            self._process = None
+        elif self._n_pending > 0:
+            try:
+                self._queue.put_nowait(self._pending)
+            except queue.Full:
+                # The plotting process is behind, so drop this batch
+                pass
+        self._pending = {key: [] for key in self._pending.keys()}
+        self._n_pending = 0
+
+    def close(self, timeout: float = 5.0) -> None:
+        self._flush()
+        if self._process is None:
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self._process.join(timeout)
+        if self._process.is_alive():
+            self._process.terminate()
+        self._process = None
@@ -1,13 +1,19 @@
 """ Record class that stores {Key: List[Value]} dict
 """
 import atexit
+import os
+import pickle
 import typing as t
+import warnings
 from collections import defaultdict
 from pathlib import Path
 
 import click
 import pandas as pd
 
+if t.TYPE_CHECKING:
+    from rlext.live_plot import LivePlot
+
 _SAVE_FN = t.Callable[[pd.DataFrame, Path], None]
 
 
@@ -40,13 +46,17 @@ def _save_parquet(df: pd.DataFrame, path: Path) -> None:
 
 
 class Record:
-    """Available colors: black, red, green, yellow, blue, magenta, cyan, white"""
+    """Available colors: black, red, green, yellow, blue, magenta, cyan, white
+    Pass `rlext.live_plot.LivePlot` as `live_plot` to plot submitted logs.
+    """
 
     _SAVE_FUNCTIONS = {
         "csv": _save_csv,
         "jsonl": _save_jsonl,
         "parquet": _save_parquet,
     }
+    # Save functions that only append to the file, so that we can roll them back
+    _APPEND_SAVE_FUNCTIONS = [_save_csv, _save_jsonl]
 
     def __init__(
         self,
@@ -58,6 +68,7 @@ class Record:
         save_path: t.Optional[Path] = None,
         save_interval: t.Optional[int] = None,
         save_fn: t.Union[str, _SAVE_FN] = "jsonl",
+        live_plot: t.Optional["LivePlot"] = None,
     ) -> None:
         self._records = defaultdict(list)
         self._stdout_config = _StdoutConfig(
@@ -69,7 +80,16 @@ class Record:
         self._save_path = save_path
         self._save_interval = save_interval
         self._save_fn = self._SAVE_FUNCTIONS.get(save_fn, save_fn)
+        self._live_plot = live_plot
         self._last_summarized_length = defaultdict(lambda: 0)
+        # Number of leading rows in self._records that are already saved
+        self._n_dumped = 0
+        # File size of save_path after the last dump
+        self._sink_offset = self._sink_size()
+        # Checkpoint state
+        self._checkpoint_path = None
+        self._checkpoint_lengths = {}
+        self._checkpoint_full = True
         atexit.register(self._dump)
 
     def submit(self, d: t.Dict[str, t.Any]) -> int:
@@ -84,6 +104,8 @@ class Record:
             raise ValueError(
                 f"Submitted log does not contain the required keys {indices}"
             )
+        if self._live_plot is not None:
+            self._live_plot.push(d)
         if interval is not None and max_length % interval == 0:
             self._summarize()
         if self._save_interval is not None and max_length % self._save_interval == 0:
@@ -95,6 +117,82 @@ class Record:
 
     def reset(self) -> None:
         self._records.clear()
+        self._n_dumped = 0
+        self._checkpoint_full = True
+
+    def checkpoint(self, path: Path) -> None:
+        """Save the buffered rows, summary counters and the sink offset to `path`.
+        Only rows submitted after the previous checkpoint are appended to `path`,
+        unless the buffer is modified by dumping or `reset`.
+        """
+        if self._checkpoint_full or self._checkpoint_path != path:
+            state = {
+                "records": dict(self._records),
+                "last_summarized_length": dict(self._last_summarized_length),
+                "n_dumped": self._n_dumped,
+                "sink_offset": self._sink_offset,
+            }
+            tmp_path = path.with_name(path.name + ".tmp")
+            with tmp_path.open(mode="wb") as f:
+                pickle.dump(("full", state), f, protocol=pickle.HIGHEST_PROTOCOL)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        else:
+            delta = {}
+            for key, records in self._records.items():
+                last_length = self._checkpoint_lengths.get(key, 0)
+                if len(records) > last_length:
+                    delta[key] = records[last_length:]
+            summarized = dict(self._last_summarized_length)
+            with path.open(mode="ab") as f:
+                pickle.dump(
+                    ("delta", delta, summarized),
+                    f,
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                )
+                f.flush()
+                os.fsync(f.fileno())
+        self._checkpoint_path = path
+        self._checkpoint_lengths = {k: len(v) for k, v in self._records.items()}
+        self._checkpoint_full = False
+
+    def restore(self, path: Path) -> None:
+        """Restore the state saved by `checkpoint` and truncate `save_path` to the
+        offset of the last dump before the checkpoint, so that rows are neither
+        duplicated nor dropped. A partially written trailing entry is ignored.
+        Only the `csv` and `jsonl` save functions can be rolled back. With others,
+        rows saved after the checkpoint are saved again, and a warning is issued.
+        """
+        frames = []
+        with path.open(mode="rb") as f:
+            while True:
+                try:
+                    frames.append(pickle.load(f))
+                except (EOFError, pickle.UnpicklingError):
+                    break
+        if len(frames) == 0 or frames[0][0] != "full":
+            raise ValueError(f"Invalid checkpoint: {path}")
+
+        state = frames[0][1]
+        self._records = defaultdict(list, state["records"])
+        self._last_summarized_length = defaultdict(
+            lambda: 0,
+            state["last_summarized_length"],
+        )
+        for _, delta, summarized in frames[1:]:
+            for key, records in delta.items():
+                self._records[key].extend(records)
+            self._last_summarized_length.update(summarized)
+        self._n_dumped = state["n_dumped"]
+        self._sink_offset = state["sink_offset"]
+        if self._save_path is not None and self._sink_size() is None:
+            warnings.warn(
+                f"{self._save_path} can't be rolled back to the checkpoint, and "
+                "rows saved after the checkpoint may be duplicated"
+            )
+        self._truncate_sink()
+        self._checkpoint_full = True
 
     def __len__(self) -> int:
         return len(self._records)
@@ -102,17 +200,42 @@ class Record:
     def __repr__(self) -> str:
         return "Record({})".format(repr(self._records))
 
+    def _sink_size(self) -> t.Optional[int]:
+        if self._save_path is None or self._save_fn not in self._APPEND_SAVE_FUNCTIONS:
+            return None
+        elif self._save_path.exists():
+            return self._save_path.stat().st_size
+        else:
+            return 0
+
+    def _truncate_sink(self) -> None:
+        size = self._sink_size()
+        if size is None or self._sink_offset is None or size <= self._sink_offset:
+            return
+        if self._sink_offset == 0:
+            # Remove the file so that _save_csv writes the header again
+            self._save_path.unlink()
+        else:
+            os.truncate(self._save_path, self._sink_offset)
+
     def _dump(self, truncate: bool = False) -> None:
         if self._save_path is None:
             return
 
-        df = pd.DataFrame(self._records)
-        self._save_fn(df, self._save_path)
+        n_dumped = self._n_dumped
+        new_records = {key: value[n_dumped:] for key, value in self._records.items()}
+        if any(len(value) > 0 for value in new_records.values()):
+            self._save_fn(pd.DataFrame(new_records), self._save_path)
+            self._sink_offset = self._sink_size()
+            self._n_dumped = max(map(len, self._records.values()))
+            self._checkpoint_full = True
         if truncate:
             interval = self._stdout_config[0]
             del_range = slice(None) if interval is None else slice(-interval)
             for records in self._records.values():
-                records.clear(del_range)
+                del records[del_range]
+            self._n_dumped = max(map(len, self._records.values()), default=0)
+            self._checkpoint_full = True
 
     def _summarize(self) -> None:
         interval, indices, color, groupby = self._stdout_config
@@ -121,10 +244,11 @@ class Record:
             recent[key] = value[-interval:]
         root_df = pd.DataFrame(recent)
         if groupby is None:
-            groupby_iter = [(0, main_df)]
-            groupby = ""
+            groupby_iter = [(0, root_df)]
+            drop_columns = indices
         else:
             groupby_iter = root_df.groupby(groupby)
+            drop_columns = indices + [groupby]
 
         for value, df in groupby_iter:
             indices_df = df[indices]
@@ -133,7 +257,7 @@ class Record:
                 continue
             self._last_summarized_length[value] = current_length
             click.secho(
-                f"============ {groupby}: {value} =============",
+                f"============ {groupby or ''}: {value} =============",
                 bg=color,
                 fg="white",
                 bold=True,
@@ -143,7 +267,6 @@ class Record:
                 [f"{idx}: {min_[idx]}-{max_[idx]}" for idx in indices]
             )
             click.secho(range_str, bg="black", fg="white")
-            df.drop(columns=indices + [groupby], inplace=True)
-            describe = df.describe()
+            describe = df.drop(columns=drop_columns).describe()
             describe.drop(labels="count", inplace=True)
             click.echo(describe)
@@ -0,0 +1,262 @@
+""" Composable, in-place transforms for batched actions and observations.
+
+All transforms accept both single samples with shape `(...)` and batches with shape
+`(N, ...)`, and write their results into `out` without allocating temporaries.
+When `out` is omitted, a new float32 array is allocated and the input is left as it
+is. `Pipeline` owns a reusable float32 buffer, so the array it returns is overwritten
+by the next call: copy it if you need to keep it.
+"""
+import abc
+import typing as t
+
+import gym
+import numpy as np
+from gym.spaces import Box
+
+_DTYPE = np.float32
+
+
+def _as_param(value: t.Any, dtype: np.dtype = _DTYPE) -> np.ndarray:
+    return np.asarray(value, dtype=dtype)
+
+
+class Transform(abc.ABC):
+    """Base class. Subclasses compute `out = f(x)` and may have `x is out`."""
+
+    def __call__(
+        self,
+        x: np.ndarray,
+        out: t.Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        x = np.asarray(x)
+        if out is None:
+            # Never overwrite the caller's array
+            out = x.astype(_DTYPE)
+            x = out
+        return self._apply(x, out)
+
+    @abc.abstractmethod
+    def _apply(self, x: np.ndarray, out: np.ndarray) -> np.ndarray:
+        pass
+
+
+class Cast(Transform):
+    def __init__(self, dtype: np.dtype = _DTYPE) -> None:
+        self._dtype = np.dtype(dtype)
+
+    def __call__(
+        self,
+        x: np.ndarray,
+        out: t.Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        x = np.asarray(x)
+        if out is None:
+            if x.dtype == self._dtype:
+                return x
+            out = np.empty(x.shape, dtype=self._dtype)
+        return self._apply(x, out)
+
+    def _apply(self, x: np.ndarray, out: np.ndarray) -> np.ndarray:
+        np.copyto(out, x, casting="unsafe")
+        return out
+
+
+class SigmoidScale(Transform):
+    """Same as `rlext.misc.box_action_scaler`: `(high - low) * sigmoid(x) + low`"""
+
+    def __init__(self, low: t.Any, high: t.Any) -> None:
+        self._low = _as_param(low)
+        self._scale = _as_param(high) - self._low
+
+    @staticmethod
+    def from_space(space: Box) -> "SigmoidScale":
+        return SigmoidScale(space.low, space.high)
+
+    def _apply(self, x: np.ndarray, out: np.ndarray) -> np.ndarray:
+        np.negative(x, out=out)
+        np.exp(out, out=out)
+        np.add(out, 1.0, out=out)
+        np.divide(self._scale, out, out=out)
+        np.add(out, self._low, out=out)
+        return out
+
+
+class TanhScale(Transform):
+    """`(high - low) * (tanh(x) + 1) / 2 + low`"""
+
+    def __init__(self, low: t.Any, high: t.Any) -> None:
+        self._low = _as_param(low)
+        self._half_scale = (_as_param(high) - self._low) * 0.5
+
+    @staticmethod
+    def from_space(space: Box) -> "TanhScale":
+        return TanhScale(space.low, space.high)
+
+    def _apply(self, x: np.ndarray, out: np.ndarray) -> np.ndarray:
+        np.tanh(x, out=out)
+        np.add(out, 1.0, out=out)
+        np.multiply(out, self._half_scale, out=out)
+        np.add(out, self._low, out=out)
+        return out
+
+
+class Clip(Transform):
+    def __init__(self, low: t.Any, high: t.Any) -> None:
+        self._low = _as_param(low)
+        self._high = _as_param(high)
+
+    @staticmethod
+    def from_space(space: Box) -> "Clip":
+        return Clip(space.low, space.high)
+
+    def _apply(self, x: np.ndarray, out: np.ndarray) -> np.ndarray:
+        return np.clip(x, self._low, self._high, out=out)
+
+
+class RunningNormalize(Transform):
+    """Normalize inputs by the running mean/variance of all inputs seen so far.
+    Statistics are accumulated in float64 and merged batch-wise (Chan et al.).
+    The initial mean/variance (0/1) act as a prior with weight `count_eps`, as
+    gym's `RunningMeanStd` does.
+    """
+
+    def __init__(
+        self,
+        shape: t.Sequence[int],
+        eps: float = 1e-8,
+        clip: t.Optional[float] = None,
+        update: bool = True,
+        count_eps: float = 1e-4,
+    ) -> None:
+        self.shape = tuple(shape)
+        self.update = update
+        self._eps = eps
+        self._clip = clip
+        self._mean = np.zeros(self.shape, dtype=np.float64)
+        self._var = np.ones(self.shape, dtype=np.float64)
+        self._count = count_eps
+        # float32 copies used in the hot path
+        self._mean32 = self._mean.astype(_DTYPE)
+        self._std32 = np.sqrt(self._var + eps).astype(_DTYPE)
+
+    @property
+    def mean(self) -> np.ndarray:
+        return self._mean
+
+    @property
+    def var(self) -> np.ndarray:
+        return self._var
+
+    @property
+    def count(self) -> float:
+        return self._count
+
+    def update_stats(self, x: np.ndarray) -> None:
+        batch = x.reshape(-1, *self.shape)
+        batch_count = batch.shape[0]
+        if batch_count == 0:
+            return
+        batch_mean = batch.mean(axis=0, dtype=np.float64)
+        batch_var = batch.var(axis=0, dtype=np.float64)
+        total = self._count + batch_count
+        delta = batch_mean - self._mean
+        m2 = (
+            self._var * self._count
+            + batch_var * batch_count
+            + delta ** 2 * self._count * batch_count / total
+        )
+        self._mean += delta * batch_count / total
+        self._var = m2 / total
+        self._count = total
+        np.copyto(self._mean32, self._mean, casting="unsafe")
+        np.copyto(self._std32, np.sqrt(self._var + self._eps), casting="unsafe")
+
+    def _apply(self, x: np.ndarray, out: np.ndarray) -> np.ndarray:
+        if self.update:
+            self.update_stats(x)
+        np.subtract(x, self._mean32, out=out)
+        np.divide(out, self._std32, out=out)
+        if self._clip is not None:
+            np.clip(out, -self._clip, self._clip, out=out)
+        return out
+
+
+class Pipeline(Transform):
+    """Apply transforms in order. The input is cast into an internal buffer of
+    `dtype` once, and all transforms then work in place on that buffer.
+    """
+
+    def __init__(self, *transforms: Transform, dtype: np.dtype = _DTYPE) -> None:
+        self._transforms = list(transforms)
+        self._dtype = np.dtype(dtype)
+        self._buffer = None
+
+    def __call__(
+        self,
+        x: np.ndarray,
+        out: t.Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        x = np.asarray(x)
+        if out is None:
+            if self._buffer is None or self._buffer.shape != x.shape:
+                self._buffer = np.empty(x.shape, dtype=self._dtype)
+            out = self._buffer
+        return self._apply(x, out)
+
+    def _apply(self, x: np.ndarray, out: np.ndarray) -> np.ndarray:
+        np.copyto(out, x, casting="unsafe")
+        for transform in self._transforms:
+            transform(out, out=out)
+        return out
+
+
+def _as_pipeline(transform: Transform) -> "Pipeline":
+    if isinstance(transform, Pipeline):
+        return transform
+    return Pipeline(transform)
+
+
+class TransformAction(gym.ActionWrapper):
+    """Apply `pipeline` to actions before passing them to the wrapped env.
+    A single transform is wrapped by `Pipeline`, so the agent's action array is
+    never modified.
+    Pass `action_space` to expose the pre-transform space to the agent (e.g. an
+    unbounded `Box` when the pipeline scales actions by `SigmoidScale`).
+    """
+
+    def __init__(
+        self,
+        env: gym.Env,
+        pipeline: Transform,
+        action_space: t.Optional[gym.Space] = None,
+    ) -> None:
+        super().__init__(env)
+        self._pipeline = _as_pipeline(pipeline)
+        if action_space is not None:
+            self.action_space = action_space
+
+    def action(self, action: np.ndarray) -> np.ndarray:
+        return self._pipeline(action)
+
+
+class TransformObservation(gym.ObservationWrapper):
+    """Apply `pipeline` to observations returned by the wrapped env.
+    Observations are copied out of the pipeline buffer unless `copy=False`.
+    """
+
+    def __init__(
+        self,
+        env: gym.Env,
+        pipeline: Transform,
+        observation_space: t.Optional[gym.Space] = None,
+        copy: bool = True,
+    ) -> None:
+        super().__init__(env)
+        self._pipeline = _as_pipeline(pipeline)
+        self._copy = copy
+        if observation_space is not None:
+            self.observation_space = observation_space
+
+    def observation(self, observation: np.ndarray) -> np.ndarray:
+        transformed = self._pipeline(observation)
+        return transformed.copy() if self._copy else transformed